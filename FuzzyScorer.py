@@ -1,9 +1,202 @@
-from datetime import datetime, timedelta
+import functools
 import math
-from collections import Counter
 
-# Optional: for text vectorization
-from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
+
+from db import epoch_seconds
+from fuzzy_kernels import NUMBA_AVAILABLE, interest_similarity, score_features
+
+# Column order of batch feature matrices
+FEATURE_NAMES = ("price", "distance", "popularity", "interest", "start_hour", "length")
+
+# Linear weights for ranking events without fuzzy inference, ordered as FEATURE_NAMES
+RANKING_WEIGHTS = np.array([0.2, 0.2, 0.1, 0.4, 0.05, 0.05], dtype=np.float32)
+
+# Batch size from which profile distances go through scipy's cdist instead of NumPy broadcasting
+_CDIST_MIN_EVENTS = 32
+
+# Number of transformed event descriptions kept per scorer
+_DESC_CACHE_SIZE = 1024
+
+# Dequantization table for features stored as uint8 (value / 255)
+_DEQUANT_LUT = (np.arange(256) / 255).astype(np.float32)
+
+
+def _clamp01(x):
+    """Clamp a score to [0.0, 1.0] with plain comparisons (no min/max calls)."""
+    return 0.0 if x < 0.0 else (1.0 if x > 1.0 else x)
+
+
+def _make_budget_scorer(max_b):
+    """
+    Build a price -> budget score function with the budget bound as a constant.
+
+    Args:
+        max_b: User budget (None or <= 0 means no budget)
+
+    Returns:
+        Function mapping an event price to a score between 0.0 and 1.0
+    """
+    # If no budget defined, only free events score
+    if not max_b or max_b <= 0:
+        return lambda cost: 1.0 if cost <= 0 else 0.0
+
+    def score(cost, max_b=max_b):
+        # Free events always get top score, otherwise lower price relative to budget is better
+        if cost <= 0:
+            return 1.0
+        x = 1 - cost / max_b
+        return 0.0 if x < 0.0 else (1.0 if x > 1.0 else x)
+
+    return score
+
+
+def _make_distance_scorer(md):
+    """
+    Build a distance -> score function with the maximum distance bound as a constant.
+
+    Args:
+        md: Maximum preferred distance (None or <= 0 means not set)
+
+    Returns:
+        Function mapping an event distance to a score between 0.0 and 1.0
+    """
+    if not md or md <= 0:
+        return lambda d: 0.5  # Default if max_distance not set
+
+    def score(d, md=md):
+        # Shorter distances get higher scores
+        x = 1 - d / md
+        return 0.0 if x < 0.0 else (1.0 if x > 1.0 else x)
+
+    return score
+
+
+def _make_time_scorer(windows, inv_tolerance):
+    """
+    Build an event -> (start hour score, length score) function over fixed preferred windows.
+
+    Both scores are computed in a single pass over the windows.
+
+    Args:
+        windows: List of (window start as float hours, window length in hours)
+        inv_tolerance: Reciprocal of the start hour difference that scores zero
+
+    Returns:
+        Function mapping an Event to a (start hour score, length score) tuple
+    """
+    if not windows:
+        return lambda event: (0.5, 0.5)
+
+    def score(event):
+        event_hour = epoch_seconds(event.start_hour) / 3600.0
+        event_length = event.event_length
+        best_start = 0.0
+        best_len_diff = math.inf
+        fits = False
+        for pref_start, pref_len in windows:
+            # Normalize how close the event start is to the user's preferred time window start
+            start = 1.0 - min(1.0, abs(event_hour - pref_start) * inv_tolerance)
+            best_start = start if start > best_start else best_start
+
+            if not fits:
+                if event_length <= pref_len:
+                    fits = True
+                else:
+                    best_len_diff = min(best_len_diff, abs(event_length - pref_len))
+
+        if fits:
+            return best_start, 1
+
+        max_diff = 1
+        return best_start, 1 - min(best_len_diff, max_diff) / max_diff
+
+    return score
+
+
+def _event_arrays(events):
+    """
+    Gather the scored attributes of a list of events into parallel NumPy arrays.
+
+    Args:
+        events: Sequence of Event objects
+
+    Returns:
+        Dictionary keyed by attribute name, holding one entry per event, plus
+        "types": the distinct categories of the batch indexed by "type_id"
+    """
+    n = len(events)
+    # Batch-local category ids, each type string is hashed once per event
+    type_ids = {}
+    ids = np.fromiter((type_ids.setdefault(e.type, len(type_ids)) for e in events), dtype=np.int32, count=n)
+    return {
+        "price": np.fromiter((e.price for e in events), dtype=np.float64, count=n),
+        "distance": np.fromiter((e.distance for e in events), dtype=np.float64, count=n),
+        "popularity": np.fromiter((e.popularity for e in events), dtype=np.float64, count=n),
+        "event_length": np.fromiter((e.event_length for e in events), dtype=np.float64, count=n),
+        "start_hour": np.fromiter((epoch_seconds(e.start_hour) / 3600.0 for e in events), dtype=np.float64, count=n),
+        "type_id": ids,
+        "types": list(type_ids),
+    }
+
+
+def build_text_profile(descriptions, n_features=2 ** 14):
+    """
+    Build a text vectorizer and user text profile for FuzzyScorer description scoring.
+
+    Uses a stateless HashingVectorizer: there is no vocabulary to fit or store,
+    and descriptions with unseen words need no refit. Results are memoized, so
+    users with the same history share one vectorizer and a read-only profile.
+
+    Args:
+        descriptions: Descriptions of events the user attended
+        n_features: Dimension of the hashed feature space
+
+    Returns:
+        Tuple of (vectorizer, 1-D profile vector), to pass as text_vectorizer and
+        user_text_profile
+    """
+    return _build_text_profile(tuple(descriptions), n_features)
+
+
+@functools.lru_cache(maxsize=128)
+def _build_text_profile(descriptions, n_features):
+    """
+    Memoized body of build_text_profile, keyed on the description tuple.
+    """
+    # Deferred so importing the scorer does not pay for sklearn
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    vectorizer = HashingVectorizer(n_features=n_features, norm="l2", alternate_sign=False)
+    profile = np.asarray(vectorizer.transform(list(descriptions)).mean(axis=0)).ravel()
+    profile.flags.writeable = False
+    return vectorizer, profile
+
+
+def quantize_features(features):
+    """
+    Store a feature matrix as 8-bit fixed point for bulk storage.
+
+    Args:
+        features: Array of scores in [0.0, 1.0], e.g. from compute_features_batch
+
+    Returns:
+        uint8 array of the same shape (score * 255, rounded)
+    """
+    return np.rint(np.clip(features, 0.0, 1.0) * 255).astype(np.uint8)
+
+
+def dequantize_features(quantized):
+    """
+    Expand uint8 features from quantize_features back to float32 scores.
+
+    Args:
+        quantized: uint8 array produced by quantize_features
+
+    Returns:
+        float32 array of scores in [0.0, 1.0]
+    """
+    return _DEQUANT_LUT[quantized]
 
 
 class FuzzyScorer:
@@ -13,18 +206,68 @@ class FuzzyScorer:
 
     Outputs a dict with keys: price, distance, popularity, interest, start_hour, length.
     All scores are normalized between 0.0 (worst match) and 1.0 (perfect match).
+
+    The scorer snapshots its preferences (budget, max distance, categories and
+    preferred times) when it is built, so the scalar and batch paths always agree.
+    Changes made to the Preferences object afterwards are not seen; build a new
+    scorer after changing them.
     """
 
-    def __init__(self, user, preferences):
+    __slots__ = ("user", "preferences", "text_vectorizer", "user_text_profile", "_profile_unit", "_unit_rows",
+                 "_desc_cache", "_user_vec", "_max_dist_cap", "_categories", "_budget",
+                 "_max_distance", "_budget_fn", "_distance_fn", "_pref_windows", "_pref_starts", "_pref_lens",
+                 "_inv_tolerance", "_time_fn", "_compiled")
+
+    def __init__(self, user, preferences, text_vectorizer=None, user_text_profile=None):
         """
         Initialize the FuzzyScorer with user data and preferences.
 
         Args:
             user: User object containing past event history and profile data
             preferences: Preferences object with user preference settings
+            text_vectorizer: Optional fitted vectorizer (e.g. TfidfVectorizer) for event descriptions
+            user_text_profile: Optional profile vector in the vectorizer's feature space, either 1-D
+                or a single row (dense, np.matrix or scipy sparse such as tfidf_matrix.mean(axis=0))
         """
         self.user = user
         self.preferences = preferences
+        self.text_vectorizer = text_vectorizer
+        self.user_text_profile = None
+        self._profile_unit = None
+        self._desc_cache = {}
+        if user_text_profile is not None:
+            # Flatten once to a contiguous 1-D array, sparse rows @ dense vector touch only the row's non-zeros
+            if hasattr(user_text_profile, "toarray"):
+                user_text_profile = user_text_profile.toarray()
+            self.user_text_profile = np.ascontiguousarray(user_text_profile, dtype=np.float64).ravel()
+            # Cosine against a unit profile only needs the description's norm per event
+            profile_norm = math.sqrt(self.user_text_profile.dot(self.user_text_profile))
+            if profile_norm > 0:
+                self._profile_unit = self.user_text_profile / profile_norm
+            else:
+                self._profile_unit = np.zeros_like(self.user_text_profile)
+        # TfidfVectorizer/HashingVectorizer rows are already unit length with norm="l2"
+        self._unit_rows = getattr(text_vectorizer, "norm", None) == "l2"
+        # User profile in the same (price, distance, popularity) space as Event.get_vector
+        self._user_vec = np.array([user.mean_price, user.mean_distance, user.mean_popularity], dtype=np.float64)
+        # Largest expected distance from the profile, bounds the similarity normalization
+        self._max_dist_cap = float(np.linalg.norm(np.maximum(self._user_vec, preferences.feature_caps))) or 1.0
+
+        # Preferences are snapshotted here, see the class docstring
+        self._categories = dict(preferences.categories or {})
+        self._budget = float(preferences.budget or 0)
+        self._max_distance = float(preferences.max_distance or 0)
+        # Per-user scorers with the constants bound as fast locals
+        self._budget_fn = _make_budget_scorer(self._budget)
+        self._distance_fn = _make_distance_scorer(self._max_distance)
+        # Window starts as float hours, so scoring never builds timedelta objects
+        self._pref_windows = [(epoch_seconds(s) / 3600.0, length) for s, length in preferences.preferred_times or []]
+        self._pref_starts = np.array([start for start, _ in self._pref_windows], dtype=np.float64)
+        self._pref_lens = np.array([length for _, length in self._pref_windows], dtype=np.float64)
+        # Start hour differences beyond this many hours score zero
+        self._inv_tolerance = 1.0 / 3.0
+        self._time_fn = _make_time_scorer(self._pref_windows, self._inv_tolerance)
+        self._compiled = self.compile()
 
     def normalize(self, value, min_val, max_val):
         """
@@ -55,10 +298,109 @@ class FuzzyScorer:
         Returns:
             Interest score between 0.0 and 1.0
         """
-        categories = self.preferences.categories
-        if event.type in categories:
-            return self.preferences.categories[event.type]
-        return 0
+        return self._categories.get(event.type, 0)
+
+    def score_similarity(self, event):
+        """
+        Score how close an event's (price, distance, popularity) vector is to the user's profile.
+
+        Args:
+            event: Event object to score
+
+        Returns:
+            Similarity score between 0.0 and 1.0 (1.0 = identical to user profile)
+        """
+        diff = self._user_vec - event.get_vector()
+        return _clamp01(1 - math.sqrt(diff.dot(diff)) / self._max_dist_cap)
+
+    def score_similarity_batch(self, events):
+        """
+        Vector similarity of many events to the user's profile in one pass.
+
+        Euclidean distances to the profile are normalized by the length of the
+        element-wise maximum of the profile and Preferences.feature_caps.
+
+        Args:
+            events: Sequence of Event objects to score
+
+        Returns:
+            Array of similarity scores between 0.0 and 1.0, one per event
+        """
+        if not events:
+            return np.empty(0)
+        events_mat = np.stack([e.get_vector() for e in events])
+        if NUMBA_AVAILABLE:
+            return interest_similarity(events_mat, self._user_vec, self._max_dist_cap)
+
+        if len(events_mat) >= _CDIST_MIN_EVENTS:
+            # Compiled distance loop without the (N, 3) difference temporary
+            from scipy.spatial.distance import cdist
+            dists = cdist(events_mat, self._user_vec[None, :], metric="euclidean").ravel()
+        else:
+            dists = np.linalg.norm(events_mat - self._user_vec, axis=1)
+        return np.clip(1 - dists / self._max_dist_cap, 0.0, 1.0)
+
+    def score_description(self, event):
+        """
+        Score cosine similarity between event description and user's text profile.
+
+        Args:
+            event: Event object with description text
+
+        Returns:
+            Description score between 0.0 and 1.0
+        """
+        if self.text_vectorizer is None or self.user_text_profile is None:
+            return 0.5  # Default if no text profile available
+
+        vec, vec_norm = self._description_row(event.description)
+        num = float(vec.dot(self._profile_unit)[0])
+        if vec_norm == 0:
+            return 0.0
+        return _clamp01(num / vec_norm)
+
+    def _description_row(self, description):
+        """
+        Sparse vectorized row of a description and its L2 norm, kept in an LRU cache.
+
+        Args:
+            description: Event description text
+
+        Returns:
+            Tuple of (sparse 1 x V row, row norm)
+        """
+        cache = self._desc_cache
+        entry = cache.pop(description, None)
+        if entry is None:
+            # Keep the TF-IDF row sparse, the dot product only touches its non-zeros
+            vec = self.text_vectorizer.transform([description])
+            entry = (vec, 1.0 if self._unit_rows else math.sqrt(vec.multiply(vec).sum()))
+            if len(cache) >= _DESC_CACHE_SIZE:
+                # Dicts keep insertion order, so the first key is the least recently used
+                del cache[next(iter(cache))]
+        cache[description] = entry
+        return entry
+
+    def score_description_batch(self, events):
+        """
+        Description scores for many events with a single vectorizer transform.
+
+        Args:
+            events: Sequence of Event objects with description text
+
+        Returns:
+            Array of description scores between 0.0 and 1.0, one per event
+        """
+        if self.text_vectorizer is None or self.user_text_profile is None:
+            return np.full(len(events), 0.5)
+
+        vecs = self.text_vectorizer.transform([e.description for e in events])
+        scores = vecs @ self._profile_unit
+        if not self._unit_rows:
+            norms = np.sqrt(np.asarray(vecs.multiply(vecs).sum(axis=1)).ravel())
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scores = np.where(norms == 0, 0.0, scores / norms)
+        return np.clip(scores, 0.0, 1.0)
 
     def score_distance(self, event):
         """
@@ -70,13 +412,7 @@ class FuzzyScorer:
         Returns:
             Distance score between 0.0 and 1.0 (1.0 = closest/best)
         """
-        d = event.distance
-        md = self.preferences.max_distance
-        if md <= 0:
-            return 0.5  # Default if max_distance not set
-
-        # Shorter distances get higher scores
-        return max(0.0, min(1.0, 1 - d / md))
+        return self._distance_fn(event.distance)
 
     def score_start_hour(self, event):
         """
@@ -88,17 +424,7 @@ class FuzzyScorer:
         Returns:
             Start hour score between 0.0 and 1.0
         """
-        # Normalize how close the event start is to the user's preferred time window start
-        if not self.preferences.preferred_times:
-            return 0.5
-
-        best_score = 0.0
-        for pref_start, _ in self.preferences.preferred_times:
-            diff = abs((event.start_hour - pref_start).total_seconds()) / 3600.0
-            score = max(0.0, min(1.0, 1 - self.normalize(diff, 0, 3)))
-            best_score = max(best_score, score)
-
-        return max(0.0, best_score)
+        return self._time_fn(event)[0]
 
     def score_length(self, event):
         """
@@ -110,19 +436,7 @@ class FuzzyScorer:
         Returns:
             Length score between 0.0 and 1.0
         """
-        if not self.preferences.preferred_times:
-            return 0.5
-
-        best_score = 2 ** 63 - 1
-        for _, len in self.preferences.preferred_times:
-            if event.event_length <= len:
-                return 1
-
-            diff = abs((event.event_length - len))
-            best_score = min(best_score, diff)
-
-        max_diff = 1
-        return max(0.0, 1 - best_score / max_diff)
+        return self._time_fn(event)[1]
 
     def compute_features(self, event):
         """
@@ -134,41 +448,173 @@ class FuzzyScorer:
         Returns:
             Dictionary of normalized scores for all features
         """
-        # Ensure popularity is between 0-1
-        pop = max(0.0, min(100.0, event.popularity)) / 100.0
+        return self._compiled(event)
 
-        # Collect all feature scores
-        features = {
-            "price": self.score_budget(event),
-            "distance": self.score_distance(event),
-            "popularity": pop,
-            "interest": self.score_interest(event),
-            "start_hour": self.score_start_hour(event),
-            "length": self.score_length(event)
-        }
+    def compile(self):
+        """
+        Build a compute_features function specialized for this scorer.
 
-        return features
+        Every preference-derived constant and helper is captured as a closure
+        local, so scoring an event does no attribute lookups on the scorer.
 
-    def score_budget(self, event):
+        Returns:
+            Function mapping an Event to the same dictionary as compute_features
         """
-        Score how well event price fits within user's budget preferences.
+        budget_fn = self._budget_fn
+        distance_fn = self._distance_fn
+        time_fn = self._time_fn
+        categories_get = self._categories.get
+
+        def compute(event):
+            # Ensure popularity is between 0-1
+            pop = event.popularity
+            pop = (0.0 if pop < 0.0 else (100.0 if pop > 100.0 else pop)) / 100.0
+
+            start_hour, length = time_fn(event)
+
+            # Collect all feature scores
+            return {
+                "price": budget_fn(event.price),
+                "distance": distance_fn(event.distance),
+                "popularity": pop,
+                "interest": categories_get(event.type, 0),
+                "start_hour": start_hour,
+                "length": length
+            }
+
+        return compute
+
+    def compute_features_batch(self, events):
+        """
+        Compute all feature scores for a batch of events at once.
+
+        Produces the same values as calling compute_features on every event, but
+        the arithmetic runs as NumPy vector operations over the whole batch.
 
         Args:
-            event: Event object with price information
+            events: Sequence of Event objects to score
 
         Returns:
-            Budget score between 0.0 and 1.0 (1.0 = best value)
+            (N, 6) float32 matrix of normalized scores, columns ordered as FEATURE_NAMES
         """
-        cost = event.price
-        max_b = self.preferences.budget
+        arrays = _event_arrays(events)
+        if NUMBA_AVAILABLE:
+            return self._features_kernel(arrays)
+        return self._features_numpy(arrays)
 
-        # Free events always get top score
-        if cost <= 0:
-            return 1.0
+    def compute_ranking_scores(self, events):
+        """
+        Feature matrix and weighted ranking score of every event in a batch.
+
+        Args:
+            events: Sequence of Event objects to score
 
-        # If no budget defined, score is zero
+        Returns:
+            Tuple of ((N, 6) float32 feature matrix, (N,) ranking scores as
+            features @ RANKING_WEIGHTS)
+        """
+        features = self.compute_features_batch(events)
+        return features, features @ RANKING_WEIGHTS
+
+    def score_top_k(self, events, k):
+        """
+        Pick the k best matching events by a weighted sum of their feature scores.
+
+        Uses a partial sort (np.argpartition), so only the k selected events are
+        fully ordered.
+
+        Args:
+            events: Sequence of Event objects to rank
+            k: Number of events to return
+
+        Returns:
+            List of up to k events, best match first
+        """
+        n = len(events)
+        if k <= 0 or n == 0:
+            return []
+
+        _, final = self.compute_ranking_scores(events)
+        if k < n:
+            idx = np.argpartition(-final, k - 1)[:k]
+        else:
+            idx = np.arange(n)
+        idx = idx[np.argsort(-final[idx], kind="stable")]
+        return [events[i] for i in idx]
+
+    def _category_weights(self, types):
+        """
+        Interest weight of every category of a batch.
+
+        Args:
+            types: Distinct categories of the batch, as returned by _event_arrays
+
+        Returns:
+            Array of weights indexed by the batch's category ids
+        """
+        return np.array([self._categories.get(event_type, 0) for event_type in types], dtype=np.float64)
+
+    def _features_kernel(self, arrays):
+        """
+        Score a batch of events with the compiled fuzzy_kernels.score_features kernel.
+        """
+        return score_features(arrays["price"], arrays["distance"], arrays["popularity"], arrays["start_hour"],
+                              arrays["event_length"], arrays["type_id"], self._category_weights(arrays["types"]),
+                              self._budget, self._max_distance,
+                              self._pref_starts, self._pref_lens)
+
+    def _features_numpy(self, arrays):
+        """
+        Score a batch of events with NumPy vector operations.
+        """
+        n = len(arrays["type_id"])
+
+        # Budget: free events always get top score, no budget scores zero
+        cost = arrays["price"]
+        max_b = self._budget
         if max_b <= 0:
-            return 0.0
+            price = np.where(cost <= 0, 1.0, 0.0)
+        else:
+            price = np.where(cost <= 0, 1.0, np.clip(1 - cost / max_b, 0.0, 1.0))
+
+        md = self._max_distance
+        if md <= 0:
+            distance = np.full(n, 0.5)
+        else:
+            distance = np.clip(1 - arrays["distance"] / md, 0.0, 1.0)
+
+        pop = np.clip(arrays["popularity"], 0.0, 100.0) / 100.0
+
+        interest = self._category_weights(arrays["types"])[arrays["type_id"]]
+
+        if not self._pref_windows:
+            start_hour = np.full(n, 0.5)
+            length = np.full(n, 0.5)
+        else:
+            # Broadcast events against preferred windows into (N, K) matrices
+            diff = np.abs(arrays["start_hour"][:, None] - self._pref_starts[None, :])
+            start_hour = (1 - np.minimum(diff * self._inv_tolerance, 1.0)).max(axis=1)
+
+            lengths = arrays["event_length"][:, None]
+            fits = (lengths <= self._pref_lens[None, :]).any(axis=1)
+            best_diff = np.abs(lengths - self._pref_lens[None, :]).min(axis=1)
+
+            max_diff = 1
+            length = np.where(fits, 1.0, np.maximum(0.0, 1 - best_diff / max_diff))
+
+        out = np.empty((n, len(FEATURE_NAMES)), dtype=np.float32)
+        for j, column in enumerate((price, distance, pop, interest, start_hour, length)):
+            out[:, j] = column
+        return out
 
-        # Higher score for lower price relative to budget
-        return max(0.0, min(1.0, 1 - cost / max_b))
+    def score_budget(self, event):
+        """
+        Score how well event price fits within user's budget preferences.
+
+        Args:
+            event: Event object with price information
+
+        Returns:
+            Budget score between 0.0 and 1.0 (1.0 = best value)
+        """
+        return self._budget_fn(event.price)
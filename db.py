@@ -1,9 +1,27 @@
+import weakref
 from collections import Counter
+from datetime import datetime
+
+import numpy as np
 
 event_types = ["music", "fine dining", "jam session", "painting", "sport", "travel", "stand up", "tech", "prelection"]
 
 
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+
+
+def epoch_seconds(dt):
+    # Seconds since the Unix epoch. Naive datetimes are measured from a naive epoch rather than read as local
+    # time, so differences match plain datetime subtraction and never shift by an hour across a DST change
+    if dt.tzinfo is None:
+        return (dt - _NAIVE_EPOCH).total_seconds()
+    return dt.timestamp()
+
+
 class Event:
+    __slots__ = ("name", "type", "price", "distance", "popularity", "description", "event_length", "start_hour",
+                 "_vec", "_vec_key")
+
     def __init__(self, name, event_type, price, distance, popularity, description, event_length, start_hour):
         self.name = name
         self.type = event_type
@@ -13,13 +31,24 @@ class Event:
         self.description = description
         self.event_length = event_length
         self.start_hour = start_hour
+        self._vec = None
+        self._vec_key = None
 
     def get_vector(self):
-        return [self.price, self.distance, self.popularity]
+        # Built on first use and rebuilt only when price, distance or popularity changed since, so repeated scoring
+        # reads the same array while the attributes stay plain slots. Read-only because it is handed out uncopied.
+        key = (self.price, self.distance, self.popularity)
+        if key != self._vec_key:
+            self._vec = np.array(key, dtype=np.float64)
+            self._vec.flags.writeable = False
+            self._vec_key = key
+        return self._vec
 
 
 class User:
     def __init__(self, events):
+        # Profile indexes (utils.UserProfileIndex) holding this user, told when the means change
+        self.profile_indexes = weakref.WeakSet()
         self.description = None
         self.mean_popularity = None
         self.mean_distance = None
@@ -28,13 +57,26 @@ class User:
         self.update()
 
     def update(self):
-        self.mean_price = sum(e.price for e in self.events) / len(self.events)
-        self.mean_distance = sum(e.distance for e in self.events) / len(self.events)
-        self.mean_popularity = sum(e.popularity for e in self.events) / len(self.events)
+        # Full recompute of the running totals, e.g. after editing self.events directly
+        self._price_total = sum(e.price for e in self.events)
+        self._distance_total = sum(e.distance for e in self.events)
+        self._popularity_total = sum(e.popularity for e in self.events)
+        self._update_means()
+
+    def _update_means(self):
+        self.mean_price = self._price_total / len(self.events)
+        self.mean_distance = self._distance_total / len(self.events)
+        self.mean_popularity = self._popularity_total / len(self.events)
+        for index in self.profile_indexes:
+            index.invalidate(self)
 
     def append_event(self, event):
+        # Adding one event only adjusts the totals, no pass over the history
         self.events.append(event)
-        self.update()
+        self._price_total += event.price
+        self._distance_total += event.distance
+        self._popularity_total += event.popularity
+        self._update_means()
 
 
 class Preferences:
@@ -53,14 +95,19 @@ class Preferences:
         self.budget = budget
 
     def is_in_preferred_time(self, event_start, event_length):
-        # Proper overlap check
-        from datetime import timedelta
-        event_end = event_start + timedelta(hours=event_length)
-        for start, length in self.preferred_times:
-            pref_end = start + timedelta(hours=length)
-            if start < event_end and event_start < pref_end:
-                return True
-        return False
+        # Proper overlap check, against all windows at once. The bounds are built per call from the current list,
+        # there are only a few windows and callers may edit preferred_times in place.
+        windows = self.preferred_times or []
+        starts = np.array([int(epoch_seconds(start)) for start, _ in windows], dtype=np.int64)
+        ends = starts + (np.array([length for _, length in windows], dtype=np.float64) * 3600).astype(np.int64)
+        start = int(epoch_seconds(event_start))
+        end = start + int(event_length * 3600)
+        return bool(np.any((starts < end) & (start < ends)))
+
+    @property
+    def feature_caps(self):
+        # Upper bounds of the (price, distance, popularity) event vector, popularity is on a 0-100 scale
+        return np.array([self.budget or 0, self.max_distance or 0, 100.0], dtype=np.float64)
 
     def get_category_interest(self, category):
         return self.categories.get(category, 0)
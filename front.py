@@ -43,6 +43,15 @@ new_events = [
 ]
 
 
+# The rule base does not depend on user input, so keep one built system per session across reruns.
+# Not st.cache_resource: that would share one system across the sessions' script threads, and the LFU cache behind
+# makeRecommendation and the lazily built FAM table are updated without locks, so they are not thread-safe.
+def get_fuzzy_system():
+    if "fuzzy_system" not in st.session_state:
+        st.session_state.fuzzy_system = FuzzySystem()
+    return st.session_state.fuzzy_system
+
+
 # Function to display events in tiles
 def display_event_tiles(events):
     st.title("Event List")
@@ -82,10 +91,12 @@ def display_event_tiles(events):
         unsafe_allow_html=True
     )
 
-    # Scorer setup
+    # Scorer setup, all events are scored and inferred in one batch
     scorer = FuzzyScorer.FuzzyScorer(user, prefs)
+    features = scorer.compute_features_batch(events)
+    labels, percents = get_fuzzy_system().makeRecommendationBatch(features)
 
-    for event in events:
+    for event, final_score, percent in zip(events, labels, percents):
         st.markdown(f"""
         <div class="event-tile">
             <h2>{event.name}</h2>
@@ -100,17 +111,6 @@ def display_event_tiles(events):
         <div class="divider"></div>
         """, unsafe_allow_html=True)
 
-        # Compute features and score
-        scores = scorer.compute_features(event)
-        final_score, percent = FuzzySystem().makeRecommendation(
-            price=scores['price'],
-            distance=scores["distance"],
-            popularity=scores["popularity"],
-            interest=scores["interest"],
-            start_hour=scores["start_hour"],
-            length=scores["length"],
-        )
-
         st.markdown(f"**Final Score**: {final_score}, percent match: {percent:.2f}%")
 
 
@@ -0,0 +1,286 @@
+import numpy as np
+
+# Numba is optional: without it the kernels below are plain Python functions and
+# callers are expected to use their NumPy code paths instead.
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def score_features(prices, distances, pops, start_hours, lengths, type_ids, cat_weights,
+                   budget, max_d, pref_starts, pref_lens):
+    """
+    Compiled equivalent of FuzzyScorer.compute_features over arrays of events.
+
+    Args:
+        prices, distances, pops, lengths: Per-event float64 arrays
+        start_hours: Per-event start times as float hours
+        type_ids: Per-event integer category ids indexing cat_weights
+        cat_weights: Interest weight of every category id
+        budget: User budget
+        max_d: Maximum preferred distance
+        pref_starts: Preferred window starts as float hours
+        pref_lens: Preferred window lengths in hours
+
+    Returns:
+        (N, 6) float32 matrix with columns price, distance, popularity,
+        interest, start_hour, length
+    """
+    n = prices.shape[0]
+    k = pref_starts.shape[0]
+    out = np.empty((n, 6), dtype=np.float32)
+
+    for i in prange(n):
+        cost = prices[i]
+        if cost <= 0:
+            price = 1.0
+        elif budget <= 0:
+            price = 0.0
+        else:
+            price = max(0.0, min(1.0, 1 - cost / budget))
+
+        if max_d <= 0:
+            distance = 0.5
+        else:
+            distance = max(0.0, min(1.0, 1 - distances[i] / max_d))
+
+        pop = max(0.0, min(100.0, pops[i])) / 100.0
+        interest = cat_weights[type_ids[i]]
+
+        if k == 0:
+            start = 0.5
+            length = 0.5
+        else:
+            start = 0.0
+            for j in range(k):
+                score = 1.0 - min(abs(start_hours[i] - pref_starts[j]) / 3.0, 1.0)
+                if score > start:
+                    start = score
+
+            # Seed with the first window rather than inf, fastmath assumes finite values
+            fits = False
+            best_diff = abs(lengths[i] - pref_lens[0])
+            for j in range(k):
+                if lengths[i] <= pref_lens[j]:
+                    fits = True
+                    break
+                diff = abs(lengths[i] - pref_lens[j])
+                if diff < best_diff:
+                    best_diff = diff
+            length = 1.0 if fits else max(0.0, 1.0 - best_diff)
+
+        out[i, 0] = price
+        out[i, 1] = distance
+        out[i, 2] = pop
+        out[i, 3] = interest
+        out[i, 4] = start
+        out[i, 5] = length
+
+    return out
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def interest_similarity(events_xyz, u_vec, max_dist_cap):
+    """
+    Similarity of event vectors to a profile vector, 1 - distance / cap clamped to [0, 1].
+
+    Fuses the squared difference, the reduction and the normalization into one
+    loop, so no (N, 3) temporary is allocated.
+
+    Args:
+        events_xyz: C-contiguous (N, D) float64 matrix of event vectors
+        u_vec: Profile vector of length D
+        max_dist_cap: Distance that maps to similarity 0
+
+    Returns:
+        float64 array of N similarity scores
+    """
+    n = events_xyz.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    for i in prange(n):
+        d = 0.0
+        for k in range(events_xyz.shape[1]):
+            diff = events_xyz[i, k] - u_vec[k]
+            d += diff * diff
+        out[i] = max(0.0, min(1.0, 1.0 - np.sqrt(d) / max_dist_cap))
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def trimf_point(x, a, b, c):
+    """
+    Triangular membership of a single value, same curve as fuzz.trimf including shoulders.
+
+    Args:
+        x: Crisp value
+        a, b, c: Left foot, peak and right foot of the triangle
+
+    Returns:
+        Membership degree in [0, 1]
+    """
+    if x == b:
+        return 1.0
+    if a < x < b:
+        return (x - a) / (b - a)
+    if b < x < c:
+        return (c - x) / (c - b)
+    return 0.0
+
+
+@njit(cache=True, fastmath=True)
+def aggregate_point(u, strengths, out_params):
+    """
+    Aggregated Mamdani output membership at one point: max over terms of the term clipped at its strength.
+
+    Args:
+        u: Point of the output universe
+        strengths: Strength of every output term
+        out_params: (T, 3) triangle vertices of every output term
+
+    Returns:
+        Membership degree in [0, 1]
+    """
+    agg = 0.0
+    for c in range(out_params.shape[0]):
+        v = min(trimf_point(u, out_params[c, 0], out_params[c, 1], out_params[c, 2]), strengths[c])
+        if v > agg:
+            agg = v
+    return agg
+
+
+@njit(cache=True, fastmath=True)
+def clipped_centroid(strengths, out_params, static_breaks, lo, hi):
+    """
+    Exact centroid of the aggregated output over [lo, hi].
+
+    The aggregate is piecewise linear, with kinks only at the term vertices, where
+    two edges cross (both strength-independent, passed as static_breaks) and where
+    an edge crosses a strength level. Between sorted breakpoints the area and first
+    moment integrals are evaluated in closed form, so no universe is sampled.
+
+    Args:
+        strengths: Strength of every output term
+        out_params: (T, 3) triangle vertices of every output term
+        static_breaks: Strength-independent breakpoints
+        lo, hi: Bounds of the output universe
+
+    Returns:
+        Crisp output, or -1.0 when every strength is zero
+    """
+    n_terms = out_params.shape[0]
+    n_static = static_breaks.shape[0]
+    breaks = np.empty(n_static + 2 * n_terms * n_terms)
+    breaks[:n_static] = static_breaks
+    k = n_static
+    for c in range(n_terms):
+        a = out_params[c, 0]
+        b = out_params[c, 1]
+        cc = out_params[c, 2]
+        for level in range(n_terms):
+            breaks[k] = a + strengths[level] * (b - a)
+            breaks[k + 1] = cc - strengths[level] * (cc - b)
+            k += 2
+    for i in range(breaks.shape[0]):
+        breaks[i] = min(max(breaks[i], lo), hi)
+    breaks.sort()
+
+    area = 0.0
+    moment = 0.0
+    x0 = breaks[0]
+    y0 = aggregate_point(x0, strengths, out_params)
+    for i in range(1, breaks.shape[0]):
+        x1 = breaks[i]
+        y1 = aggregate_point(x1, strengths, out_params)
+        dx = x1 - x0
+        area += dx * (y0 + y1)
+        moment += dx * (x0 * (2 * y0 + y1) + x1 * (y0 + 2 * y1))
+        x0 = x1
+        y0 = y1
+
+    if area <= 0.0:
+        return -1.0
+    # area and moment are 2x and 6x the integrals
+    return moment / (3.0 * area)
+
+
+@njit(cache=True, fastmath=True)
+def mamdani_infer(x, in_universes, in_params, rule_terms, rule_is_or, rule_consequent, out_params, out_breaks,
+                  out_lo, out_hi):
+    """
+    Mamdani inference (min/max rules, clipped outputs, centroid) for one crisp input vector.
+
+    Memberships are evaluated in closed form from the triangle vertices and the
+    centroid is integrated analytically, so apart from small scratch arrays
+    nothing is allocated and no universe is scanned.
+
+    Args:
+        x: Crisp value of every input variable
+        in_universes: (I, U) universe of every input variable, used for clipping
+        in_params: (I, T, 3) triangle vertices of every input term
+        rule_terms: (R, I) term index used by each rule per input, -1 where the input is unused
+        rule_is_or: (R,) True for OR rules, False for AND rules
+        rule_consequent: (R,) output term index of each rule
+        out_params: (T_out, 3) triangle vertices of every output term
+        out_breaks: Strength-independent breakpoints of the aggregated output
+        out_lo, out_hi: Bounds of the output universe
+
+    Returns:
+        Crisp output, or -1.0 when no rule fires
+    """
+    n_inputs = in_params.shape[0]
+    n_terms = in_params.shape[1]
+
+    mu = np.empty((n_inputs, n_terms))
+    for j in range(n_inputs):
+        # Clip crisp inputs to the universe like the skfuzzy simulator
+        xj = min(max(x[j], in_universes[j, 0]), in_universes[j, -1])
+        for t in range(n_terms):
+            mu[j, t] = trimf_point(xj, in_params[j, t, 0], in_params[j, t, 1], in_params[j, t, 2])
+
+    strengths = np.zeros(out_params.shape[0])
+    for r in range(rule_terms.shape[0]):
+        is_or = rule_is_or[r]
+        fire = 0.0 if is_or else 1.0
+        for j in range(n_inputs):
+            t = rule_terms[r, j]
+            if t < 0:
+                continue
+            if is_or:
+                fire = max(fire, mu[j, t])
+            else:
+                fire = min(fire, mu[j, t])
+        c = rule_consequent[r]
+        if fire > strengths[c]:
+            strengths[c] = fire
+
+    return clipped_centroid(strengths, out_params, out_breaks, out_lo, out_hi)
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def mamdani_infer_batch(features, in_universes, in_params, rule_terms, rule_is_or, rule_consequent, out_params,
+                        out_breaks, out_lo, out_hi):
+    """
+    mamdani_infer over every row of a feature matrix, rows run in parallel.
+
+    Args:
+        features: C-contiguous (N, I) float64 matrix of crisp inputs
+        Others: As for mamdani_infer
+
+    Returns:
+        float64 array of N crisp outputs, -1.0 where no rule fires
+    """
+    n = features.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    for i in prange(n):
+        out[i] = mamdani_infer(features[i], in_universes, in_params, rule_terms, rule_is_or, rule_consequent,
+                               out_params, out_breaks, out_lo, out_hi)
+    return out
@@ -1,216 +1,437 @@
+import collections
+import functools
+import itertools
+import logging
+import operator
+
 import numpy as np
-import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 import FuzzyScorer
+from fuzzy_kernels import NUMBA_AVAILABLE, mamdani_infer, mamdani_infer_batch
 from db import Event, User, Preferences
 from datetime import datetime, timedelta
 
 # Optional: for text vectorization
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+# Antecedent names in the column order of FuzzyScorer.compute_features_batch
+INPUT_VARIABLES = ('price_match', 'distance_match', 'popularity_range', 'interest_match', 'start_hour_match',
+                   'length_match')
+TERMS = ('low', 'medium', 'high')
+
+# Log every event's feature vector in the demo driver
+DEBUG = False
+
+logger = logging.getLogger(__name__)
+
+# Rule base shared by create_rules and the array kernels: (connective, term per input or None, consequent)
+RULES = [
+    ('and', ('high', 'high', 'high', 'high', 'high', 'high'), 'high'),
+    ('and', ('high', 'high', 'medium', 'high', 'high', 'high'), 'high'),
+    ('and', ('high', 'medium', 'high', 'high', 'high', 'high'), 'high'),
+    ('and', ('high', 'high', 'high', 'high', 'medium', 'high'), 'high'),
+
+    ('and', ('medium', 'medium', None, 'medium', None, None), 'medium'),
+    ('and', (None, None, 'medium', None, 'high', 'medium'), 'medium'),
+    ('and', ('high', None, 'high', 'medium', None, None), 'medium'),
+    ('and', ('medium', None, 'low', 'high', None, 'medium'), 'medium'),
+
+    ('and', ('low', 'low', 'low', 'low', 'low', 'low'), 'low'),
+    ('and', ('low', 'medium', 'low', 'low', 'low', 'low'), 'low'),
+    ('or', ('medium', 'medium', None, 'medium', None, None), 'medium'),
+    ('or', ('low', 'low', None, 'low', None, None), 'low'),
+]
+
+# Triangle vertices of the terms, shared by every input variable and by the output
+_INPUT_TERMS = {'low': [0, 0, 0.4], 'medium': [0.2, 0.5, 0.8], 'high': [0.6, 1, 1]}
+_OUTPUT_TERMS = {'low': [0, 0.2, 0.4], 'medium': [0.3, 0.5, 0.8], 'high': [0.7, 1, 1]}
+
+# Common [0, 1] universe of every variable and the membership curves over it, evaluated once at import. Every
+# FuzzySystem shares these arrays, so they are read-only. Inference evaluates the triangles in closed form from
+# _INPUT_TERMS/_OUTPUT_TERMS and only takes the clipping bounds from the universe; the sampled curves feed the
+# skfuzzy variables and the FAM's dominant-term lookup, which is all float32 is kept for.
+_MF_UNIVERSE = np.arange(0, 1.01, 0.01, dtype=np.float32)
+
+
+def _trimf(universe, abc):
+    # Same curve as fuzz.trimf, including shoulders where a == b or b == c, but keeps the universe dtype
+    a, b, c = abc
+    mf = np.zeros_like(universe)
+    if a != b:
+        rising = (a < universe) & (universe < b)
+        mf[rising] = (universe[rising] - a) / (b - a)
+    if b != c:
+        falling = (b < universe) & (universe < c)
+        mf[falling] = (c - universe[falling]) / (c - b)
+    mf[universe == b] = 1
+    return mf
+
+
+_INPUT_MFS = {term: _trimf(_MF_UNIVERSE, abc) for term, abc in _INPUT_TERMS.items()}
+_OUTPUT_MFS = {term: _trimf(_MF_UNIVERSE, abc) for term, abc in _OUTPUT_TERMS.items()}
+for _shared in (_MF_UNIVERSE, *_INPUT_MFS.values(), *_OUTPUT_MFS.values()):
+    _shared.flags.writeable = False
+
+
+def _trimf_values(x, a, b, c):
+    # fuzz.trimf at arbitrary points instead of a sampled universe, x broadcasts against the vertex arrays
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rising = np.where((a < x) & (x < b), (x - a) / (b - a), 0)
+        falling = np.where((b < x) & (x < c), (c - x) / (c - b), 0)
+    return np.where(x == b, 1.0, rising + falling)
+
+
+def _static_breaks(params, lo, hi):
+    # Kinks of the aggregated output that do not depend on the term strengths: the universe bounds, every
+    # vertex and every point where two term edges cross
+    lines = []
+    for a, b, c in params:
+        if a != b:
+            lines.append((1 / (b - a), -a / (b - a)))
+        if b != c:
+            lines.append((-1 / (c - b), c / (c - b)))
+    crossings = [(k2 - k1) / (m1 - m2) for (m1, k1), (m2, k2) in itertools.combinations(lines, 2) if m1 != m2]
+    breaks = np.clip(np.array([lo, hi, *np.ravel(params), *crossings], dtype=np.float64), lo, hi)
+    return np.unique(breaks)
+
+
+def _trimf_source(var, abc):
+    # Closed-form fuzz.trimf of one value as a Python expression, degenerate edges dropped
+    a, b, c = (float(v) for v in abc)
+    branches = [f"1.0 if {var} == {b!r}"]
+    if a != b:
+        branches.append(f"({var} - {a!r}) * {1 / (b - a)!r} if {a!r} < {var} < {b!r}")
+    if b != c:
+        branches.append(f"({c!r} - {var}) * {1 / (c - b)!r} if {b!r} < {var} < {c!r}")
+    return " else ".join(branches) + " else 0.0"
+
+
+def _compile_rule_strengths():
+    # Partially evaluate RULES and the input triangles into straight-line Python: clip the six inputs, compute
+    # only the memberships some rule reads, take min/max per rule and max per consequent. Returns a function of
+    # the six crisp inputs giving the strength of every output term in TERMS order.
+    low, high = float(_MF_UNIVERSE[0]), float(_MF_UNIVERSE[-1])
+    lines = [f"def rule_strengths({', '.join(f'x{j}' for j in range(len(INPUT_VARIABLES)))}):"]
+    lines += [f"    x{j} = min(max(x{j}, {low!r}), {high!r})" for j in range(len(INPUT_VARIABLES))]
+
+    used = sorted({(j, TERMS.index(term)) for _, terms, _ in RULES for j, term in enumerate(terms) if term})
+    lines += [f"    m{j}_{t} = {_trimf_source(f'x{j}', _INPUT_TERMS[TERMS[t]])}" for j, t in used]
+
+    by_consequent = {term: [] for term in TERMS}
+    for r, (connective, terms, consequent) in enumerate(RULES):
+        reduce_fn = 'min' if connective == 'and' else 'max'
+        operands = ', '.join(f"m{j}_{TERMS.index(term)}" for j, term in enumerate(terms) if term)
+        lines.append(f"    r{r} = {reduce_fn}({operands})")
+        by_consequent[consequent].append(f"r{r}")
+    lines.append("    return (" + ", ".join(f"max(0.0, {', '.join(by_consequent[term])})" for term in TERMS) + ",)")
+
+    namespace = {}
+    exec(compile("\n".join(lines), "<fuzzy_sets rules>", "exec"), namespace)
+    return namespace["rule_strengths"]
+
+
+_rule_strengths = _compile_rule_strengths()
+
+
+def _memo_key(value):
+    # Clamp to the [0, 1] universe, inference clips there anyway so every input beyond it gives the same result.
+    # No rounding: the key is what inference runs on, so only exactly repeated inputs may share an entry. float()
+    # makes NumPy scores and Python floats of the same value produce the same key.
+    return min(max(float(value), 0.0), 1.0)
+
+
+class _LFUCache:
+    # Least-frequently-used memo, ties evicted least recently used first. Keys live in one insertion-ordered
+    # bucket per use count, so lookups and evictions are O(1). hits/misses are kept to judge the cache size,
+    # but they only count makeRecommendation calls: front.py and the demo use makeRecommendationBatch, which
+    # bypasses the cache, so the counters say nothing about their traffic.
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._values = {}
+        self._counts = {}
+        self._buckets = collections.defaultdict(dict)
+        self._min_count = 0
+
+    def get_or_compute(self, key, compute):
+        if key in self._values:
+            self.hits += 1
+            count = self._counts[key]
+            bucket = self._buckets[count]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[count]
+                if self._min_count == count:
+                    self._min_count = count + 1
+            self._counts[key] = count + 1
+            self._buckets[count + 1][key] = None
+            return self._values[key]
+
+        self.misses += 1
+        value = compute(*key)
+        if len(self._values) >= self.maxsize:
+            bucket = self._buckets[self._min_count]
+            evicted = next(iter(bucket))
+            del bucket[evicted]
+            if not bucket:
+                del self._buckets[self._min_count]
+            del self._values[evicted]
+            del self._counts[evicted]
+        self._values[key] = value
+        self._counts[key] = 1
+        self._buckets[1][key] = None
+        self._min_count = 1
+        return value
+
 
 class FuzzySystem:
     def __init__(self):
-        self.price_match = ctrl.Antecedent(np.arange(0, 1.01, 0.01), 'price_match')
-        self.distance_match = ctrl.Antecedent(np.arange(0, 1.01, 0.01), 'distance_match')
-        self.popularity_range = ctrl.Antecedent(np.arange(0, 1.01, 0.01), 'popularity_range')
-        self.interest_match = ctrl.Antecedent(np.arange(0, 1.01, 0.01), 'interest_match')
-        self.start_hour_match = ctrl.Antecedent(np.arange(0, 1.01, 0.01), 'start_hour_match')
-        self.length_match = ctrl.Antecedent(np.arange(0, 1.01, 0.01), 'length_match')
-        self.recommendation_match = ctrl.Consequent(np.arange(0, 1.01, 0.01), 'recommendation_match')
+        self.price_match = ctrl.Antecedent(_MF_UNIVERSE, 'price_match')
+        self.distance_match = ctrl.Antecedent(_MF_UNIVERSE, 'distance_match')
+        self.popularity_range = ctrl.Antecedent(_MF_UNIVERSE, 'popularity_range')
+        self.interest_match = ctrl.Antecedent(_MF_UNIVERSE, 'interest_match')
+        self.start_hour_match = ctrl.Antecedent(_MF_UNIVERSE, 'start_hour_match')
+        self.length_match = ctrl.Antecedent(_MF_UNIVERSE, 'length_match')
+        self.recommendation_match = ctrl.Consequent(_MF_UNIVERSE, 'recommendation_match')
 
         self.create_sets()
         self.create_rules()
+        self.create_tables()
 
-        self.system = ctrl.ControlSystem(self.rules)
-        self.simulator = ctrl.ControlSystemSimulation(self.system)
+        # Memoized inference keyed on the exact (clamped) inputs. LFU keeps the few hot feature combinations that
+        # dominate recommendation traffic cached through bursts of one-off events.
+        self.cache = _LFUCache(maxsize=1024)
+
+    # The skfuzzy control system and simulator are not used for inference, they are only built for callers that
+    # ask for them. flush_after_run bounds the simulator's internal result cache.
+    @functools.cached_property
+    def system(self):
+        return ctrl.ControlSystem(self.rules)
+
+    @functools.cached_property
+    def simulator(self):
+        return ctrl.ControlSystemSimulation(self.system, flush_after_run=100)
 
     def create_sets(self):
-        self.price_match['low'] = fuzz.trimf(self.price_match.universe, [0, 0, 0.4])
-        self.price_match['medium'] = fuzz.trimf(self.price_match.universe, [0.2, 0.5, 0.8])
-        self.price_match['high'] = fuzz.trimf(self.price_match.universe, [0.6, 1, 1])
+        for name in INPUT_VARIABLES:
+            variable = getattr(self, name)
+            for term in TERMS:
+                variable[term] = _INPUT_MFS[term]
 
-        self.distance_match['low'] = fuzz.trimf(self.distance_match.universe, [0, 0, 0.4])
-        self.distance_match['medium'] = fuzz.trimf(self.distance_match.universe, [0.2, 0.5, 0.8])
-        self.distance_match['high'] = fuzz.trimf(self.distance_match.universe, [0.6, 1, 1])
+        for term in TERMS:
+            self.recommendation_match[term] = _OUTPUT_MFS[term]
 
-        self.popularity_range['low'] = fuzz.trimf(self.popularity_range.universe, [0, 0, 0.4])
-        self.popularity_range['medium'] = fuzz.trimf(self.popularity_range.universe, [0.2, 0.5, 0.8])
-        self.popularity_range['high'] = fuzz.trimf(self.popularity_range.universe, [0.6, 1, 1])
+    def create_rules(self):
+        self.rules = []
+        for connective, terms, consequent in RULES:
+            antecedents = [getattr(self, name)[term] for name, term in zip(INPUT_VARIABLES, terms) if term]
+            combine = operator.and_ if connective == 'and' else operator.or_
+            self.rules.append(ctrl.Rule(functools.reduce(combine, antecedents), self.recommendation_match[consequent]))
 
-        self.interest_match['low'] = fuzz.trimf(self.interest_match.universe, [0, 0, 0.4])
-        self.interest_match['medium'] = fuzz.trimf(self.interest_match.universe, [0.2, 0.5, 0.8])
-        self.interest_match['high'] = fuzz.trimf(self.interest_match.universe, [0.6, 1, 1])
+    def create_tables(self):
+        # Membership functions and RULES as plain arrays for the compiled inference kernel
+        self._in_universes = np.array([getattr(self, name).universe for name in INPUT_VARIABLES], dtype=np.float32)
+        self._in_mfs = np.array([[getattr(self, name)[term].mf for term in TERMS] for name in INPUT_VARIABLES],
+                                dtype=np.float32)
+        self._rule_terms = np.array([[TERMS.index(term) if term else -1 for term in terms] for _, terms, _ in RULES],
+                                    dtype=np.int64)
+        self._rule_is_or = np.array([connective == 'or' for connective, _, _ in RULES])
+        self._rule_consequent = np.array([TERMS.index(consequent) for _, _, consequent in RULES], dtype=np.int64)
+        self._out_universe = np.asarray(self.recommendation_match.universe, dtype=np.float32)
+        # Triangle vertices for the closed-form memberships of the compiled kernel
+        self._in_params = np.array([[_INPUT_TERMS[term] for term in TERMS] for _ in INPUT_VARIABLES], dtype=np.float64)
+        self._out_params = np.array([_OUTPUT_TERMS[term] for term in TERMS], dtype=np.float64)
+        self._out_lo = float(self._out_universe[0])
+        self._out_hi = float(self._out_universe[-1])
+        self._out_breaks = _static_breaks(self._out_params, self._out_lo, self._out_hi)
+        # Built by lookupRecommendationLabels on first use, so plain inference never pays for it
+        self._fam = None
 
-        self.start_hour_match['low'] = fuzz.trimf(self.start_hour_match.universe, [0, 0, 0.4])
-        self.start_hour_match['medium'] = fuzz.trimf(self.start_hour_match.universe, [0.2, 0.5, 0.8])
-        self.start_hour_match['high'] = fuzz.trimf(self.start_hour_match.universe, [0.6, 1, 1])
+    def _build_fam(self):
+        # Fuzzy associative memory: the label inferred at every combination of term prototypes (0, 0.5, 1 are
+        # where low, medium and high peak), indexed by one term per input. Combinations firing no rule are 'low'.
+        prototypes = np.array([0, 0.5, 1], dtype=np.float32)
+        grid = np.array(list(itertools.product(range(len(TERMS)), repeat=len(INPUT_VARIABLES))))
+        labels, outputs = self.makeRecommendationBatch(prototypes[grid])
+        fam = np.array([TERMS.index(label) for label in labels], dtype=np.int8)
+        fam[np.isnan(outputs)] = TERMS.index('low')
+        return fam.reshape((len(TERMS),) * len(INPUT_VARIABLES))
 
-        self.length_match['low'] = fuzz.trimf(self.length_match.universe, [0, 0, 0.4])
-        self.length_match['medium'] = fuzz.trimf(self.length_match.universe, [0.2, 0.5, 0.8])
-        self.length_match['high'] = fuzz.trimf(self.length_match.universe, [0.6, 1, 1])
+    def makeRecommendation(self, price, distance, popularity, interest, start_hour, length):
+        # Repeated inputs share one cached inference, which runs on the key itself
+        key = (_memo_key(price), _memo_key(distance), _memo_key(popularity), _memo_key(interest),
+               _memo_key(start_hour), _memo_key(length))
+        return self.cache.get_or_compute(key, self._compute)
 
-        self.recommendation_match['low'] = fuzz.trimf(self.recommendation_match.universe, [0, 0.2, 0.4])
-        self.recommendation_match['medium'] = fuzz.trimf(self.recommendation_match.universe, [0.3, 0.5, 0.8])
-        self.recommendation_match['high'] = fuzz.trimf(self.recommendation_match.universe, [0.7, 1, 1])
+    def _compute(self, price, distance, popularity, interest, start_hour, length):
+        # Compiled kernel when numba is available, otherwise generated Python rules. Both use the same rules and
+        # triangles as the skfuzzy simulator, which is only built on demand as self.simulator.
+        if NUMBA_AVAILABLE:
+            x = np.array([price, distance, popularity, interest, start_hour, length])
+            output = mamdani_infer(x, self._in_universes, self._in_params, self._rule_terms, self._rule_is_or,
+                                   self._rule_consequent, self._out_params, self._out_breaks, self._out_lo,
+                                   self._out_hi)
+        else:
+            # Rule strengths from the generated straight-line function, only the aggregation uses NumPy
+            strengths = _rule_strengths(price, distance, popularity, interest, start_hour, length)
+            output = float(self._defuzzify(np.array([strengths], dtype=np.float64))[0])
+        if output < 0 or np.isnan(output):
+            raise ValueError("No rule fired for the given inputs, crisp output cannot be calculated")
+        return self.getRecommendationLabel(output), output * 100
 
-    def create_rules(self):
-        self.rules = [
-            ctrl.Rule(
-                self.price_match['high'] & self.distance_match['high'] & self.popularity_range['high'] &
-                self.interest_match['high'] & self.start_hour_match['high'] & self.length_match['high'],
-                self.recommendation_match['high']
-            ),
-            ctrl.Rule(
-                self.price_match['high'] & self.distance_match['high'] & self.popularity_range['medium'] &
-                self.interest_match['high'] & self.start_hour_match['high'] & self.length_match['high'],
-                self.recommendation_match['high']
-            ),
-            ctrl.Rule(
-                self.price_match['high'] & self.distance_match['medium'] & self.popularity_range['high'] &
-                self.interest_match['high'] & self.start_hour_match['high'] & self.length_match['high'],
-                self.recommendation_match['high']
-            ),
-            ctrl.Rule(
-                self.price_match['high'] & self.distance_match['high'] & self.popularity_range['high'] &
-                self.interest_match['high'] & self.start_hour_match['medium'] & self.length_match['high'],
-                self.recommendation_match['high']
-            ),
-
-            ctrl.Rule(
-                self.price_match['medium'] & self.distance_match['medium'] & self.interest_match['medium'],
-                self.recommendation_match['medium']
-            ),
-            ctrl.Rule(
-                self.start_hour_match['high'] & self.length_match['medium'] & self.popularity_range['medium'],
-                self.recommendation_match['medium']
-            ),
-            ctrl.Rule(
-                self.price_match['high'] & self.popularity_range['high'] & self.interest_match['medium'],
-                self.recommendation_match['medium']
-            ),
-            ctrl.Rule(
-                self.interest_match['high'] & self.length_match['medium'] & self.popularity_range['low'] &
-                self.price_match['medium'], self.recommendation_match['medium']
-            ),
-
-            ctrl.Rule(
-                self.price_match['low'] & self.distance_match['low'] & self.popularity_range['low'] &
-                self.interest_match['low'] & self.start_hour_match['low'] & self.length_match['low'],
-                self.recommendation_match['low']
-            ),
-            ctrl.Rule(
-                self.price_match['low'] & self.distance_match['medium'] & self.popularity_range['low'] &
-                self.interest_match['low'] & self.start_hour_match['low'] & self.length_match['low'],
-                self.recommendation_match['low']
-            ),
-            ctrl.Rule(
-                self.price_match['medium'] | self.distance_match['medium'] | self.interest_match['medium'],
-                self.recommendation_match['medium']
-            ),
-            ctrl.Rule(
-                self.price_match['low'] | self.distance_match['low'] | self.interest_match['low'],
-                self.recommendation_match['low']),
-        ]
+    def makeRecommendationBatch(self, features):
+        # Mamdani inference for many events at once with NumPy, same rules and membership functions as
+        # makeRecommendation. features is an (N, 6) array ordered as INPUT_VARIABLES. Returns the labels
+        # and percent scores; events that fire no rule get a NaN score.
+        if NUMBA_AVAILABLE:
+            # Events are independent, the compiled kernel runs them across cores
+            output = mamdani_infer_batch(np.ascontiguousarray(features, dtype=np.float64), self._in_universes,
+                                         self._in_params, self._rule_terms, self._rule_is_or, self._rule_consequent,
+                                         self._out_params, self._out_breaks, self._out_lo, self._out_hi)
+            output[output < 0] = np.nan
+        else:
+            output = self._infer(features)
+        a, b, c = self._out_params.T
+        label_memberships = _trimf_values(output[:, None], a, b, c)
+        labels = [TERMS[i] for i in np.argmax(label_memberships, axis=1)]
+        return labels, output * 100
 
-    def makeRecommendation(self, price, distance, popularity, interest, start_hour, length):
-        self.simulator.input['price_match'] = price
-        self.simulator.input['distance_match'] = distance
-        self.simulator.input['popularity_range'] = popularity
-        self.simulator.input['interest_match'] = interest
-        self.simulator.input['start_hour_match'] = start_hour
-        self.simulator.input['length_match'] = length
+    def _infer(self, features):
+        # Crisp Mamdani outputs in [0, 1] for an (N, 6) feature array, NaN where no rule fires
+        return self._defuzzify(self._strengths(features))
 
-        self.simulator.compute()
+    def _strengths(self, features):
+        # (N, 3) strength of every output term for an (N, 6) feature array, table-driven from RULES.
+        # Like the simulator, clip crisp inputs to their universes, one pass over the whole matrix
+        x = np.clip(np.asarray(features, dtype=np.float64), self._in_universes[:, 0], self._in_universes[:, -1])
+        n, n_inputs = x.shape
 
-        output = self.simulator.output['recommendation_match']
-        return self.getRecommendationLabel(output), output * 100
+        # mu[N, 6, 3 + 1]: closed-form membership of every input in every term, exact at the vertices like the
+        # other engines, plus a neutral column that rule_terms == -1 selects, 1 for AND rules and 0 for OR rules
+        # so unused inputs never change the firing strength
+        a, b, c = self._in_params[..., 0], self._in_params[..., 1], self._in_params[..., 2]
+        mu_and = np.ones((n, n_inputs, len(TERMS) + 1))
+        mu_and[:, :, :-1] = _trimf_values(x[:, :, None], a, b, c)
+        mu_or = mu_and.copy()
+        mu_or[:, :, -1] = 0
+
+        # (N, 12, 6) antecedent memberships per rule, reduced to (N, 12) firing strengths
+        inputs = np.arange(n_inputs)[None, :]
+        firing = np.where(self._rule_is_or,
+                          mu_or[:, inputs, self._rule_terms].max(axis=2),
+                          mu_and[:, inputs, self._rule_terms].min(axis=2))
+
+        # (N, 3) strength of every output term, the max over the rules concluding it
+        strengths = np.stack([firing[:, self._rule_consequent == t].max(axis=1, initial=0.0)
+                              for t in range(len(TERMS))], axis=1)
+        return strengths
+
+    def _defuzzify(self, strengths):
+        # Exact centroid of the aggregated output for (N, 3) term strengths, NaN where all are zero. The aggregate
+        # is piecewise linear between the static breakpoints and the points where an edge crosses a strength
+        # level, so the area and moment integrals are summed in closed form over those instead of a universe.
+        strengths = np.asarray(strengths, dtype=np.float64)
+        n = strengths.shape[0]
+        if n == 0:
+            return np.empty(0)
+        a, b, c = self._out_params.T
+        rising = a[None, :, None] + strengths[:, None, :] * (b - a)[None, :, None]
+        falling = c[None, :, None] - strengths[:, None, :] * (c - b)[None, :, None]
+        breaks = np.concatenate([np.broadcast_to(self._out_breaks, (n, self._out_breaks.size)),
+                                 rising.reshape(n, -1), falling.reshape(n, -1)], axis=1)
+        breaks = np.sort(np.clip(breaks, self._out_lo, self._out_hi), axis=1)
+
+        mu = np.minimum(_trimf_values(breaks[:, :, None], a, b, c), strengths[:, None, :]).max(axis=2)
+        x0, x1 = breaks[:, :-1], breaks[:, 1:]
+        y0, y1 = mu[:, :-1], mu[:, 1:]
+        area = ((x1 - x0) * (y0 + y1)).sum(axis=1)
+        moment = ((x1 - x0) * (x0 * (2 * y0 + y1) + x1 * (y0 + 2 * y1))).sum(axis=1)
+        # area and moment are 2x and 6x the integrals
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return moment / (3 * area)
+
+    def lookupRecommendationLabels(self, features):
+        # Approximate labels for an (N, 6) feature array without rule evaluation or defuzzification: every input
+        # is reduced to its dominant term and the label of that term combination is read from the FAM
+        if self._fam is None:
+            self._fam = self._build_fam()
+        x = np.clip(np.asarray(features, dtype=np.float32), self._in_universes[:, 0], self._in_universes[:, -1])
+        terms = np.empty(x.shape, dtype=np.intp)
+        for j in range(x.shape[1]):
+            terms[:, j] = np.argmax([np.interp(x[:, j], self._in_universes[j], mf) for mf in self._in_mfs[j]], axis=0)
+        return [TERMS[i] for i in self._fam[tuple(terms.T)]]
 
     def getRecommendationLabel(self, output):
-        low_membership = fuzz.interp_membership(
-            self.recommendation_match.universe,
-            self.recommendation_match['low'].mf,
-            output
-        )
-
-        medium_membership = fuzz.interp_membership(
-            self.recommendation_match.universe,
-            self.recommendation_match['medium'].mf,
-            output
-        )
-
-        high_membership = fuzz.interp_membership(
-            self.recommendation_match.universe,
-            self.recommendation_match['high'].mf,
-            output
-        )
-
-        memberships = {
-            'low': low_membership,
-            'medium': medium_membership,
-            'high': high_membership
-        }
-
-        return max(memberships, key=memberships.get)
-
-
-past = [
-    Event("Concert A", "music", 40, 5, 80, "A vibrant musical night with upbeat vibes", 3,
-          datetime.now().replace(hour=19)),
-    Event("Tech Talk", "tech", 60, 10, 70, "An insightful session on the latest in AI", 1.5,
-          datetime.now().replace(hour=17))
-]
-user = User(past)
-preferred_times = [
-    (datetime.now().replace(hour=18, minute=0, second=0, microsecond=0), 2),  # 6 PM for 2 hours
-    (datetime.now().replace(hour=20, minute=0, second=0, microsecond=0), 1.5)  # 8 PM for 1.5 hours
-]
+        # Term with the highest membership at the crisp output, TERMS doubles as the index -> label table
+        a, b, c = self._out_params.T
+        return TERMS[_trimf_values(output, a, b, c).argmax()]
+
+
+@functools.lru_cache(maxsize=1)
+def get_fuzzy_system():
+    # The rule base is input-independent, so one compiled system serves every event
+    return FuzzySystem()
 
-# Define preferences
-prefs = Preferences(
-    max_distance=10,  # Prefers events within 10 km
-    categories={"music": 0.9, "tech": 0.6, "science": 1.0, "jazz": 0.0},  # High interest in music, some in tech
-    preferred_times=preferred_times,
-    budget=100,  # Budget constraints
-)
-
-new_events = [
-    Event("Jazz Night", "music", 45, 3, 75, "Smooth jazz evening with mellow tunes", 2,
-          datetime.now().replace(hour=18)),
-    Event("AI Meetup", "tech", 120, 8, 85, "Discuss AI trends and machine learning insights", 5,
-          datetime.now().replace(hour=20)),
-    Event("XD event", "standup", 50, 1, 85, "Discuss AI trends and machine learning insights", 5,
-          datetime.now().replace(hour=21)),
-    Event("Best event", "science", 0, 0, 100, "BEST DESCRIPTION", 1.5,
-          datetime.now().replace(hour=20, minute=0, second=0, microsecond=0)),
-    Event("Worst event", "jazz", 110, 11, 0, "The worst event possible",
-          3, datetime.now().replace(hour=2, minute=0, second=0, microsecond=0))
-]
 
+# Demo run, only when executed as a script so importing FuzzySystem (e.g. from front.py) stays cheap
+def main():
+    past = [
+        Event("Concert A", "music", 40, 5, 80, "A vibrant musical night with upbeat vibes", 3,
+              datetime.now().replace(hour=19)),
+        Event("Tech Talk", "tech", 60, 10, 70, "An insightful session on the latest in AI", 1.5,
+              datetime.now().replace(hour=17))
+    ]
+    user = User(past)
+    preferred_times = [
+        (datetime.now().replace(hour=18, minute=0, second=0, microsecond=0), 2),  # 6 PM for 2 hours
+        (datetime.now().replace(hour=20, minute=0, second=0, microsecond=0), 1.5)  # 8 PM for 1.5 hours
+    ]
 
-print("User Text Profile Descriptions:")
-print()
-print("User Preferences:")
-print(f"  Max Distance: {prefs.max_distance}")
-print(f"  Categories: {prefs.categories}")
-print(f"  Preferred Times: {prefs.preferred_times}")
-print(f"  Budget for Category: {prefs.budget}\n")
-
-scorer = FuzzyScorer.FuzzyScorer(user, prefs)
-for evt in new_events:
-    print(f"Event: {evt.name}")
-    print(f"  Description: {evt.description}")
-    # Event features omitted for brevity
-    scores = scorer.compute_features(evt)
-    print(scores)
-
-    final_score = FuzzySystem().makeRecommendation(
-        price=scores['price'],
-        distance=scores["distance"],
-        popularity=scores["popularity"],
-        interest=scores["interest"],
-        start_hour=scores["start_hour"],
-        length=scores["length"],
+    # Define preferences
+    prefs = Preferences(
+        max_distance=10,  # Prefers events within 10 km
+        categories={"music": 0.9, "tech": 0.6, "science": 1.0, "jazz": 0.0},  # High interest in music, some in tech
+        preferred_times=preferred_times,
+        budget=100,  # Budget constraints
     )
-    print(final_score)
-    print()
+
+    new_events = [
+        Event("Jazz Night", "music", 45, 3, 75, "Smooth jazz evening with mellow tunes", 2,
+              datetime.now().replace(hour=18)),
+        Event("AI Meetup", "tech", 120, 8, 85, "Discuss AI trends and machine learning insights", 5,
+              datetime.now().replace(hour=20)),
+        Event("XD event", "standup", 50, 1, 85, "Discuss AI trends and machine learning insights", 5,
+              datetime.now().replace(hour=21)),
+        Event("Best event", "science", 0, 0, 100, "BEST DESCRIPTION", 1.5,
+              datetime.now().replace(hour=20, minute=0, second=0, microsecond=0)),
+        Event("Worst event", "jazz", 110, 11, 0, "The worst event possible",
+              3, datetime.now().replace(hour=2, minute=0, second=0, microsecond=0))
+    ]
+
+
+    logging.basicConfig(level=logging.DEBUG if DEBUG else logging.INFO, format="%(message)s")
+    logger.info("User Text Profile Descriptions:\n\nUser Preferences:\n  Max Distance: %s\n  Categories: %s\n"
+                "  Preferred Times: %s\n  Budget for Category: %s\n",
+                prefs.max_distance, prefs.categories, prefs.preferred_times, prefs.budget)
+
+    scorer = FuzzyScorer.FuzzyScorer(user, prefs)
+    # Score and infer all events in one batch instead of one simulator run per event
+    features = scorer.compute_features_batch(new_events)
+    labels, outputs = get_fuzzy_system().makeRecommendationBatch(features)
+
+    # Collect the report and log it once instead of several records per event
+    debug = logger.isEnabledFor(logging.DEBUG)
+    lines = []
+    for evt, row, label, output in zip(new_events, features, labels, outputs):
+        lines.append(f"Event: {evt.name}")
+        lines.append(f"  Description: {evt.description}")
+        if debug:
+            lines.append(str(dict(zip(FuzzyScorer.FEATURE_NAMES, row.tolist()))))
+        lines.append(str((label, output)))
+        lines.append("")
+    logger.info("%s", "\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
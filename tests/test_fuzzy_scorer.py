@@ -0,0 +1,99 @@
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import FuzzyScorer
+from db import Event, Preferences, User
+
+# Numba is optional, the compiled kernel is only exercised where it is installed
+ENGINES = [pytest.param(True, id="numba",
+                        marks=pytest.mark.skipif(not FuzzyScorer.NUMBA_AVAILABLE, reason="numba not installed")),
+           pytest.param(False, id="numpy")]
+
+BASE = datetime(2026, 3, 29, 0)
+
+PREFERENCES = {
+    "full": dict(max_distance=10, budget=100, categories={"music": 0.9, "tech": 0.6},
+                 preferred_times=[(BASE + timedelta(hours=18), 2), (BASE + timedelta(hours=20), 1.5)]),
+    "no_budget_or_distance": dict(max_distance=None, budget=None, categories={"music": 0.9},
+                                  preferred_times=[(BASE + timedelta(hours=18), 2)]),
+    "no_windows": dict(max_distance=10, budget=100, categories={"music": 0.9}, preferred_times=[]),
+    "nothing": dict(max_distance=None, budget=None, categories=None, preferred_times=None),
+}
+
+
+def _events(n, seed):
+    # Prices, distances and popularities beyond the caps and free events, plus categories missing from the
+    # preferences
+    rng = np.random.default_rng(seed)
+    types = ["music", "tech", "science", "jazz"]
+    return [Event(f"event {i}", types[i % len(types)], float(rng.choice([0, rng.uniform(-10, 150)])),
+                  float(rng.uniform(0, 15)), float(rng.uniform(-10, 110)), "description", float(rng.uniform(0.5, 4)),
+                  BASE + timedelta(minutes=int(rng.integers(0, 24 * 60))))
+            for i in range(n)]
+
+
+def _scorer(preferences):
+    user = User(_events(3, seed=0))
+    return FuzzyScorer.FuzzyScorer(user, Preferences(**preferences))
+
+
+@pytest.mark.parametrize("numba", ENGINES)
+@pytest.mark.parametrize("preferences", PREFERENCES.values(), ids=PREFERENCES.keys())
+def test_batch_matches_compute_features(numba, preferences, monkeypatch):
+    monkeypatch.setattr(FuzzyScorer, "NUMBA_AVAILABLE", numba)
+    scorer = _scorer(preferences)
+    events = _events(200, seed=1)
+
+    batch = scorer.compute_features_batch(events)
+    expected = np.array([[scorer.compute_features(e)[name] for name in FuzzyScorer.FEATURE_NAMES] for e in events])
+    assert batch.shape == (len(events), len(FuzzyScorer.FEATURE_NAMES))
+    np.testing.assert_allclose(batch, expected, atol=1e-6)
+
+
+@pytest.mark.parametrize("numba", ENGINES)
+def test_empty_batches(numba, monkeypatch):
+    monkeypatch.setattr(FuzzyScorer, "NUMBA_AVAILABLE", numba)
+    scorer = _scorer(PREFERENCES["full"])
+    assert scorer.compute_features_batch([]).shape == (0, len(FuzzyScorer.FEATURE_NAMES))
+    assert scorer.score_similarity_batch([]).shape == (0,)
+
+
+@pytest.mark.parametrize("numba", ENGINES)
+def test_start_hour_ignores_local_dst(numba, monkeypatch):
+    # Clocks go forward at 02:00 on 2026-03-29 in Warsaw, naive datetimes still differ by wall-clock hours
+    monkeypatch.setenv("TZ", "Europe/Warsaw")
+    time.tzset()
+    try:
+        monkeypatch.setattr(FuzzyScorer, "NUMBA_AVAILABLE", numba)
+        preferences = Preferences(max_distance=10, budget=100, categories={"music": 1.0},
+                                  preferred_times=[(datetime(2026, 3, 29, 1), 2)])
+        scorer = FuzzyScorer.FuzzyScorer(User(_events(3, seed=0)), preferences)
+        event = Event("late", "music", 10, 1, 50, "description", 1, datetime(2026, 3, 29, 4))
+
+        assert scorer.compute_features(event)["start_hour"] == 0.0
+        assert scorer.compute_features_batch([event])[0, FuzzyScorer.FEATURE_NAMES.index("start_hour")] == 0.0
+        assert not preferences.is_in_preferred_time(datetime(2026, 3, 29, 3), 1)
+        assert preferences.is_in_preferred_time(datetime(2026, 3, 29, 2, 30), 1)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_preferred_times_edited_in_place():
+    preferences = Preferences(preferred_times=[])
+    assert not preferences.is_in_preferred_time(BASE + timedelta(hours=10), 1)
+    preferences.preferred_times.append((BASE + timedelta(hours=9), 2))
+    assert preferences.is_in_preferred_time(BASE + timedelta(hours=10), 1)
+
+
+def test_event_vector_follows_attributes():
+    event = _events(1, seed=2)[0]
+    vector = event.get_vector()
+    assert event.get_vector() is vector
+    assert not vector.flags.writeable
+
+    event.price = 20.0
+    np.testing.assert_array_equal(event.get_vector(), [20.0, event.distance, event.popularity])
@@ -0,0 +1,173 @@
+import functools
+import operator
+
+import numpy as np
+import pytest
+import skfuzzy as fuzz
+from skfuzzy import control as ctrl
+
+import fuzzy_sets
+
+# Numba is optional, the compiled paths are only exercised where it is installed
+ENGINES = [pytest.param(True, id="numba",
+                        marks=pytest.mark.skipif(not fuzzy_sets.NUMBA_AVAILABLE, reason="numba not installed")),
+           pytest.param(False, id="numpy")]
+
+# Inputs for which no rule fires: all high except popularity low
+NO_RULE_FIRES = (1.0, 1.0, 0.0, 1.0, 1.0, 1.0)
+
+
+@pytest.fixture(scope="module")
+def fuzzy_system():
+    return fuzzy_sets.FuzzySystem()
+
+
+@pytest.fixture
+def engine_system(request, monkeypatch):
+    # Fresh system per engine, so the makeRecommendation cache never serves results of the other engine
+    monkeypatch.setattr(fuzzy_sets, "NUMBA_AVAILABLE", request.param)
+    return fuzzy_sets.FuzzySystem()
+
+
+@pytest.fixture(scope="module")
+def reference_simulation():
+    # Plain float64 scikit-fuzzy build of the same rule base, the engines are checked against it
+    universe = np.arange(0, 1.01, 0.01)
+    variables = {name: ctrl.Antecedent(universe, name) for name in fuzzy_sets.INPUT_VARIABLES}
+    output = ctrl.Consequent(universe, "recommendation_match")
+    for variable in variables.values():
+        for term, abc in fuzzy_sets._INPUT_TERMS.items():
+            variable[term] = fuzz.trimf(universe, abc)
+    for term, abc in fuzzy_sets._OUTPUT_TERMS.items():
+        output[term] = fuzz.trimf(universe, abc)
+
+    rules = []
+    for connective, terms, consequent in fuzzy_sets.RULES:
+        antecedents = [variables[name][term] for name, term in zip(fuzzy_sets.INPUT_VARIABLES, terms) if term]
+        combine = operator.and_ if connective == "and" else operator.or_
+        rules.append(ctrl.Rule(functools.reduce(combine, antecedents), output[consequent]))
+    return ctrl.ControlSystemSimulation(ctrl.ControlSystem(rules), cache=False)
+
+
+def _reference_output(simulation, row):
+    for name, value in zip(fuzzy_sets.INPUT_VARIABLES, row):
+        simulation.input[name] = value
+    simulation.compute()
+    return simulation.output["recommendation_match"]
+
+
+def _random_inputs(n, seed):
+    # Mostly inside the universe, some outside to exercise clipping, plus the term vertices
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(-0.2, 1.2, size=(n, len(fuzzy_sets.INPUT_VARIABLES)))
+    vertices = np.array([0, 0.2, 0.4, 0.5, 0.6, 0.8, 1])
+    x[: n // 4] = rng.choice(vertices, size=(n // 4, x.shape[1]))
+    return x
+
+
+def test_generated_rule_strengths_match_rule_table(fuzzy_system):
+    x = _random_inputs(500, seed=0)
+    expected = fuzzy_system._strengths(x)
+    generated = np.array([fuzzy_sets._rule_strengths(*row) for row in x.tolist()])
+    np.testing.assert_allclose(generated, expected, atol=1e-12)
+
+
+@pytest.mark.parametrize("engine_system", ENGINES, indirect=True)
+def test_engines_match_scikit_fuzzy(engine_system, reference_simulation):
+    # scikit-fuzzy samples the aggregated output on the 0.01 universe, so its centroid is only exact to 1e-4
+    # for firing strengths on that grid. Off-grid inputs are covered by test_scalar_matches_batch_off_grid.
+    x = np.round(_random_inputs(300, seed=1), 2)
+    batch_labels, batch_percent = engine_system.makeRecommendationBatch(x)
+
+    checked = 0
+    for row, batch_label, percent in zip(x.tolist(), batch_labels, batch_percent):
+        if np.isnan(percent):
+            with pytest.raises(ValueError):
+                engine_system.makeRecommendation(*row)
+            continue
+        expected = _reference_output(reference_simulation, row)
+        label, scalar_percent = engine_system.makeRecommendation(*row)
+
+        assert scalar_percent / 100 == pytest.approx(expected, abs=1e-4)
+        assert percent / 100 == pytest.approx(expected, abs=1e-4)
+        assert label == batch_label == engine_system.getRecommendationLabel(expected)
+        checked += 1
+    assert checked > 250
+
+
+@pytest.mark.parametrize("engine_system", ENGINES, indirect=True)
+def test_no_rule_fires(engine_system):
+    with pytest.raises(ValueError):
+        engine_system.makeRecommendation(*NO_RULE_FIRES)
+    _, percent = engine_system.makeRecommendationBatch(np.array([NO_RULE_FIRES]))
+    assert np.isnan(percent[0])
+
+
+@pytest.mark.parametrize("engine_system", ENGINES, indirect=True)
+def test_scalar_matches_batch_off_grid(engine_system):
+    # Off the 0.01 universe grid: the cached scalar path must infer on the exact inputs, like the batch path.
+    # 0.7986 is just below 0.8, where rounding would drop the only medium membership and fire no rule.
+    x = np.vstack([[0.9599, 0.9609, 0.3798, 0.7986, 0.4389, 0.1961], _random_inputs(500, seed=3)])
+    batch_labels, batch_percent = engine_system.makeRecommendationBatch(x)
+    for row, batch_label, percent in zip(x.tolist(), batch_labels, batch_percent):
+        if np.isnan(percent):
+            with pytest.raises(ValueError):
+                engine_system.makeRecommendation(*row)
+            continue
+        label, scalar_percent = engine_system.makeRecommendation(*row)
+        assert scalar_percent == pytest.approx(percent, abs=1e-9)
+        assert label == batch_label
+    assert not np.isnan(batch_percent[0])
+
+
+@pytest.mark.parametrize("engine_system", ENGINES, indirect=True)
+def test_empty_batch(engine_system):
+    labels, percent = engine_system.makeRecommendationBatch(np.empty((0, len(fuzzy_sets.INPUT_VARIABLES))))
+    assert labels == []
+    assert percent.shape == (0,)
+
+
+def _square(x):
+    return x * x
+
+
+def test_lfu_cache_evicts_least_frequent_then_least_recent():
+    cache = fuzzy_sets._LFUCache(maxsize=2)
+    cache.get_or_compute((1,), _square)
+    cache.get_or_compute((2,), _square)
+    # Tie on count 1: the older key goes
+    cache.get_or_compute((3,), _square)
+    assert set(cache._values) == {(2,), (3,)}
+
+    # (2,) and (3,) reach count 2, emptying bucket 1, so the minimum count moves up
+    cache.get_or_compute((2,), _square)
+    cache.get_or_compute((3,), _square)
+    assert cache._min_count == 2
+    assert 1 not in cache._buckets
+
+    # Tie on count 2: (2,) reached it first, so it is evicted, and the new key resets the minimum to 1
+    assert cache.get_or_compute((4,), _square) == 16
+    assert set(cache._values) == {(3,), (4,)}
+    assert cache._min_count == 1
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_lfu_cache_matches_brute_force_reference():
+    rng = np.random.default_rng(2)
+    maxsize = 5
+    cache = fuzzy_sets._LFUCache(maxsize=maxsize)
+    # Reference: key -> (use count, time of last use), evicting the minimum of both
+    reference = {}
+    for step, k in enumerate(rng.integers(0, 12, size=5000).tolist()):
+        key = (k,)
+        if key in reference:
+            reference[key] = (reference[key][0] + 1, step)
+        else:
+            if len(reference) >= maxsize:
+                del reference[min(reference, key=reference.get)]
+            reference[key] = (1, step)
+
+        assert cache.get_or_compute(key, _square) == k * k
+        assert set(cache._values) == set(reference)
+        assert {key: count for key, (count, _) in reference.items()} == cache._counts
+        assert cache._min_count == min(count for count, _ in reference.values())
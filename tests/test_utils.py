@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import numpy as np
+
+from db import Event, User
+from utils import UserProfileIndex, get_similar_users
+
+
+def _user(rng):
+    return User([_event(rng) for _ in range(int(rng.integers(1, 4)))])
+
+
+def _event(rng):
+    return Event("event", "music", float(rng.uniform(0, 100)), float(rng.uniform(0, 10)), float(rng.uniform(0, 100)),
+                 "description", 1, datetime(2026, 1, 1, 18))
+
+
+def test_index_matches_list_queries():
+    rng = np.random.default_rng(0)
+    users = [_user(rng) for _ in range(40)]
+    index = UserProfileIndex(users)
+    queries = [_user(rng) for _ in range(5)] + users[:3]
+
+    for k in (1, 3, 10, 100):
+        for query in queries:
+            assert get_similar_users(index, query, k) == get_similar_users(users, query, k)
+
+
+def test_index_follows_user_changes():
+    rng = np.random.default_rng(1)
+    users = [_user(rng) for _ in range(20)]
+    index = UserProfileIndex(users)
+    query = _user(rng)
+    get_similar_users(index, query, 5)
+
+    # Means change through append_event and update, and users join after the first query
+    users[0].append_event(_event(rng))
+    users[1].events.append(_event(rng))
+    users[1].update()
+    for user in (_user(rng), _user(rng)):
+        users.append(user)
+        index.add(user)
+
+    for k in (1, 5, 30):
+        assert get_similar_users(index, query, k) == get_similar_users(users, query, k)
+
+
+def test_empty_population():
+    query = _user(np.random.default_rng(2))
+    assert get_similar_users([], query) == []
+    assert get_similar_users(UserProfileIndex([]), query) == []
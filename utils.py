@@ -5,17 +5,69 @@ import numpy as np
 
 
 def calculate_euclidean_distance(user: User, event):
-    return math.sqrt(math.pow(user.mean_distance - event.distance, 2) +
-                     math.pow(user.mean_price - event.price, 2) +
-                     math.pow(user.mean_popularity - event.popularity, 2))
+    dd = user.mean_distance - event.distance
+    dp = user.mean_price - event.price
+    dq = user.mean_popularity - event.popularity
+    return math.sqrt(dd * dd + dp * dp + dq * dq)
 
 
 def calculate_similarity(event1, event2):
-    return 1 - np.linalg.norm(event1 - event2)
+    diff = event1 - event2
+    return 1 - math.sqrt(diff.dot(diff))
 
 
-def get_similar_users(users: list[User], user: User):
-    similar_users = users.copy()
-    similar_users.sort(key=lambda db_user: calculate_euclidean_distance(user, db_user))
-    return similar_users[:3]
+def _profile(user: User):
+    return user.mean_distance, user.mean_price, user.mean_popularity
+
+
+class UserProfileIndex:
+    # (N, 3) matrix of the users' mean (distance, price, popularity) profiles for repeated get_similar_users
+    # queries over the same population. Users notify the index when their means change, so a query rebuilds
+    # only the rows of users that changed and never rescans the population.
+    def __init__(self, users):
+        self.users = []
+        self._rows = {}
+        self._dirty = set()
+        self._profiles = np.empty((0, 3), dtype=np.float64)
+        for user in users:
+            self.add(user)
+
+    def add(self, user: User):
+        self._rows.setdefault(user, []).append(len(self.users))
+        self.users.append(user)
+        self._dirty.add(user)
+        user.profile_indexes.add(self)
+
+    def invalidate(self, user: User):
+        self._dirty.add(user)
+
+    def profiles(self):
+        if len(self._profiles) < len(self.users):
+            grown = np.empty((len(self.users), 3), dtype=np.float64)
+            grown[:len(self._profiles)] = self._profiles
+            self._profiles = grown
+        for user in self._dirty:
+            self._profiles[self._rows[user]] = _profile(user)
+        self._dirty.clear()
+        return self._profiles
+
+
+def get_similar_users(users, user: User, k=3):
+    # Squared distances between the mean (distance, price, popularity) profiles of all users in one vectorized
+    # pass, then a partial sort for the k nearest. sqrt is monotone, so ranking does not need it. users is a
+    # list, or a UserProfileIndex to reuse its profile matrix across queries.
+    if isinstance(users, UserProfileIndex):
+        profiles = users.profiles()
+        users = users.users
+    else:
+        profiles = np.array([_profile(u) for u in users], dtype=np.float64).reshape(-1, 3)
+    if not users:
+        return []
+    query = np.array([user.mean_distance, user.mean_price, user.mean_popularity], dtype=np.float64)
+    diff = profiles - query
+    distances = np.einsum('ij,ij->i', diff, diff)
+
+    k = min(k, len(users))
+    nearest = np.argpartition(distances, k - 1)[:k]
+    return [users[i] for i in nearest[np.argsort(distances[nearest])]]
 